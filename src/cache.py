@@ -0,0 +1,63 @@
+import hashlib
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+import pandas as pd
+
+# Pasta do cache e quantidade de versões mantidas por etapa
+CACHE_DIR = Path(__file__).parent / ".cache"
+MAX_ENTRADAS_POR_ETAPA = 3
+
+def calcular_chave(caminhos: Iterable, *extras: str) -> str:
+    """Gera a chave do cache a partir de nome, tamanho e mtime dos arquivos de entrada"""
+    digest = hashlib.blake2b(digest_size=16)
+
+    for caminho in sorted(Path(c) for c in caminhos):
+        stat = caminho.stat()
+        digest.update(f"{caminho.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+
+    # Valores extras que também invalidam o cache (ex.: data de referência)
+    for extra in extras:
+        digest.update(f"{extra};".encode())
+
+    return digest.hexdigest()
+
+def ler_cache(etapa: str, chave: str) -> Optional[Dict[str, pd.DataFrame]]:
+    """Retorna as tabelas salvas para a etapa/chave ou None se não houver cache"""
+    pasta = CACHE_DIR / f"{etapa}-{chave}"
+    if not pasta.is_dir():
+        return None
+
+    return {arquivo.stem: pd.read_feather(arquivo) for arquivo in sorted(pasta.glob("*.feather"))}
+
+def salvar_cache(etapa: str, chave: str, tabelas: Dict[str, pd.DataFrame]):
+    """Salva as tabelas da etapa em Feather sem compressão e descarta versões antigas"""
+    pasta = CACHE_DIR / f"{etapa}-{chave}"
+    temporaria = CACHE_DIR / f".{etapa}-{chave}.tmp"
+    shutil.rmtree(temporaria, ignore_errors=True)
+    temporaria.mkdir(parents=True)
+
+    for nome, df in tabelas.items():
+        df.to_feather(temporaria / f"{nome}.feather", compression="uncompressed")
+
+    # Renomeia só no final para nunca deixar um cache incompleto
+    shutil.rmtree(pasta, ignore_errors=True)
+    temporaria.rename(pasta)
+    limpar_cache(etapa)
+
+def limpar_cache(etapa: str, max_entradas: int = MAX_ENTRADAS_POR_ETAPA):
+    """Mantém apenas as versões mais recentes do cache da etapa"""
+    versoes = sorted(CACHE_DIR.glob(f"{etapa}-*"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for antiga in versoes[max_entradas:]:
+        shutil.rmtree(antiga, ignore_errors=True)
+
+def executar_com_cache(etapa: str, chave: str, funcao: Callable[[], Dict[str, pd.DataFrame]]) -> Dict[str, pd.DataFrame]:
+    """Executa a etapa apenas quando não existe cache para a chave informada"""
+    tabelas = ler_cache(etapa, chave)
+    if tabelas is not None:
+        print(f"♻️ {etapa}: reaproveitando cache {chave[:8]}")
+        return tabelas
+
+    tabelas = funcao()
+    salvar_cache(etapa, chave, tabelas)
+    return tabelas
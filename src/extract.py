@@ -1,10 +1,107 @@
 import os
-import pickle
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# Leitor de Excel em Rust (python-calamine) quando instalado; openpyxl como fallback
+EXCEL_ENGINE = 'calamine' if importlib.util.find_spec('python_calamine') else 'openpyxl'
+
+# Schemas explícitos por arquivo (evitam a inferência de tipos do parser)
+# Datas seguem como texto e são convertidas no transform.py
+_ID = pa.int32()
+_TEXTO = pa.string()
+_VALOR = pa.float64()
+
+SCHEMAS_CSV = {
+    'agencias': {
+        'cod_agencia': _ID, 'nome': _TEXTO, 'endereco': _TEXTO, 'cidade': _TEXTO,
+        'uf': _TEXTO, 'data_abertura': _TEXTO, 'tipo_agencia': _TEXTO
+    },
+    'colaborador_agencia': {
+        'cod_colaborador': _ID, 'cod_agencia': _ID
+    },
+    'colaboradores': {
+        'cod_colaborador': _ID, 'primeiro_nome': _TEXTO, 'ultimo_nome': _TEXTO, 'email': _TEXTO,
+        'cpf': _TEXTO, 'data_nascimento': _TEXTO, 'endereco': _TEXTO, 'cep': _TEXTO
+    },
+    'contas': {
+        'num_conta': _ID, 'cod_cliente': _ID, 'cod_agencia': _ID, 'cod_colaborador': _ID,
+        'tipo_conta': _TEXTO, 'data_abertura': _TEXTO, 'saldo_total': _VALOR,
+        'saldo_disponivel': _VALOR, 'data_ultimo_lancamento': _TEXTO
+    },
+    'propostas_credito': {
+        'cod_proposta': _ID, 'cod_cliente': _ID, 'cod_colaborador': _ID,
+        'data_entrada_proposta': _TEXTO, 'taxa_juros_mensal': _VALOR, 'valor_proposta': _VALOR,
+        'valor_financiamento': _VALOR, 'valor_entrada': _VALOR, 'valor_prestacao': _VALOR,
+        'quantidade_parcelas': pa.int64(), 'carencia': pa.int64(), 'status_proposta': _TEXTO
+    },
+    'transacoes': {
+        'cod_transacao': _ID, 'num_conta': _ID, 'data_transacao': _TEXTO,
+        'nome_transacao': _TEXTO, 'valor_transacao': _VALOR
+    }
+}
+
+def ler_csv_arrow(caminho: str, encoding: str, schema: dict = None) -> pa.Table:
+    """Lê um CSV com o parser multi-thread do PyArrow"""
+    return pacsv.read_csv(
+        caminho,
+        read_options=pacsv.ReadOptions(use_threads=True, encoding=encoding),
+        parse_options=pacsv.ParseOptions(delimiter=','),
+        convert_options=pacsv.ConvertOptions(column_types=schema or {})
+    )
+
+def possui_colunas_binarias(tabela: pa.Table) -> bool:
+    """Indica se o PyArrow não conseguiu decodificar alguma coluna como texto"""
+    return any(pa.types.is_binary(campo.type) for campo in tabela.schema)
+
+def ler_arquivo_csv(pasta_dados: str, arquivo: str) -> tuple:
+    """
+    Lê um único arquivo CSV, com fallback de encoding.
+    
+    Args:
+        pasta_dados: Caminho da pasta contendo o arquivo
+        arquivo: Nome do arquivo CSV
+        
+    Returns:
+        Tupla (nome_do_arquivo, DataFrame) ou None em caso de falha
+    """
+    caminho = os.path.join(pasta_dados, arquivo)
+    
+    if not os.path.exists(caminho):
+        print(f"⚠ Arquivo não encontrado: {arquivo}")
+        return None
+        
+    nome_df = os.path.splitext(arquivo)[0]
+    schema = SCHEMAS_CSV.get(nome_df)
+    
+    try:
+        try:
+            # Tentativa com UTF-8 (colunas inferidas com texto inválido viram binárias)
+            tabela = ler_csv_arrow(caminho, 'utf8', schema)
+            utf8_valido = not possui_colunas_binarias(tabela)
+        except pa.ArrowInvalid:
+            # Colunas declaradas como texto rejeitam UTF-8 inválido
+            utf8_valido = False
+        
+        if not utf8_valido:
+            # Fallback para Latin-1
+            tabela = ler_csv_arrow(caminho, 'latin1', schema)
+            print(f"✔ {arquivo} lido com Latin-1")
+        else:
+            print(f"✔ {arquivo} lido com UTF-8")
+        
+        return nome_df, tabela.to_pandas(self_destruct=True)
+            
+    except Exception as e:
+        print(f"❌ Falha ao ler {arquivo}: {str(e)}")
+        return None
 
 def carregar_dados_csv(pasta_dados: str, arquivos_csv: list) -> dict:
     """
     Carrega arquivos CSV para DataFrames e retorna um dicionário.
+    Os arquivos são independentes e lidos em paralelo.
     
     Args:
         pasta_dados: Caminho da pasta contendo os arquivos
@@ -13,35 +110,14 @@ def carregar_dados_csv(pasta_dados: str, arquivos_csv: list) -> dict:
     Returns:
         Dicionário com {nome_do_arquivo: DataFrame}
     """
-    tabelas = {}
+    if not arquivos_csv:
+        return {}
     
-    for arquivo in arquivos_csv:
-        caminho = os.path.join(pasta_dados, arquivo)
-        
-        if not os.path.exists(caminho):
-            print(f"⚠ Arquivo não encontrado: {arquivo}")
-            continue
-            
-        nome_df = os.path.splitext(arquivo)[0]
-        
-        try:
-            # Tentativa com UTF-8
-            tabelas[nome_df] = pd.read_csv(caminho, sep=',', encoding='utf-8')
-            print(f"✔ {arquivo} lido com UTF-8")
-            
-        except UnicodeDecodeError:
-            try:
-                # Fallback para Latin-1
-                tabelas[nome_df] = pd.read_csv(caminho, sep=',', encoding='latin1')
-                print(f"✔ {arquivo} lido com Latin-1")
-                
-            except Exception as e:
-                print(f"❌ Falha ao ler {arquivo}: {str(e)}")
-                continue
-                
-        except Exception as e:
-            print(f"❌ Erro inesperado com {arquivo}: {str(e)}")
-            continue
+    # O PyArrow libera o GIL durante o parse, então threads bastam
+    max_workers = min(len(arquivos_csv), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        resultados = executor.map(lambda arquivo: ler_arquivo_csv(pasta_dados, arquivo), arquivos_csv)
+        tabelas = dict(resultado for resultado in resultados if resultado is not None)
     
     return tabelas
 
@@ -63,14 +139,14 @@ def carregar_excel(pasta_dados: str, nome_arquivo: str) -> pd.DataFrame:
         return None
     
     try:
-        df = pd.read_excel(caminho)
+        df = pd.read_excel(caminho, engine=EXCEL_ENGINE)
         print(f"✔ {nome_arquivo} lido com sucesso: {df.shape[0]} linhas, {df.shape[1]} colunas")
         return df
     except Exception as e:
         print(f"❌ Falha ao ler {nome_arquivo}: {str(e)}")
         return None
 
-def main():
+def main(salvar: bool = True):
     # Configuração de caminhos
     base_dir = os.path.dirname(os.path.abspath(__file__))
     pasta_dados = os.path.abspath(os.path.join(base_dir, '..', 'banco_uxbg'))
@@ -98,9 +174,13 @@ def main():
     for nome, df in tabelas.items():
         print(f"- {nome}: {df.shape[0]} linhas, {df.shape[1]} colunas")
     
-    # Salva os dados em pickle
-    with open('dados_extraidos.pkl', 'wb') as f:
-        pickle.dump(tabelas, f)
+    # Salva os dados em Parquet (um arquivo por tabela)
+    if salvar:
+        pasta_saida = os.path.join(base_dir, 'dados_extraidos')
+        os.makedirs(pasta_saida, exist_ok=True)
+        for nome, df in tabelas.items():
+            df.to_parquet(os.path.join(pasta_saida, f'{nome}.parquet'),
+                          engine='pyarrow', compression='zstd', compression_level=1)
     
     return tabelas
 
@@ -1,39 +1,72 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+import pyarrow.feather as feather
 
-# Caminho para os dados intermediários (salvos no transform.ipynb)
-data_folder = r'c:/Users/guilh/OneDrive/Documentos/GitHub/desafio_reals_bet/src/dados_transformados'
+# Caminho para os dados intermediários (salvos pelo transform.py)
+data_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados_transformados')
 
-# Verificar se os arquivos existem antes de carregar
-if not os.path.exists(data_folder):
-    raise FileNotFoundError(f"Pasta '{data_folder}' não encontrada!")
+# Tabelas transformadas
+nomes_tabelas = [
+    'agencias',
+    'clientes',
+    'colaborador_agencia',
+    'colaboradores',
+    'contas',
+    'propostas_credito',
+    'transacoes'
+]
 
-# Ler os arquivos transformados
-agencias = pd.read_pickle(os.path.join(data_folder, 'agencias.pkl'))
-clientes = pd.read_pickle(os.path.join(data_folder, 'clientes.pkl'))
-colaborador_agencia = pd.read_pickle(os.path.join(data_folder, 'colaborador_agencia.pkl'))
-colaboradores = pd.read_pickle(os.path.join(data_folder, 'colaboradores.pkl'))
-contas = pd.read_pickle(os.path.join(data_folder, 'contas.pkl'))
-propostas_credito = pd.read_pickle(os.path.join(data_folder, 'propostas_credito.pkl'))
-transacoes = pd.read_pickle(os.path.join(data_folder, 'transacoes.pkl'))
+# Leitura via memory-map: as páginas do arquivo são carregadas sob demanda
+def ler_feather(nome_arquivo):
+    caminho = os.path.join(data_folder, f'{nome_arquivo}.feather')
+    return feather.read_table(caminho, memory_map=True).to_pandas(self_destruct=True)
+
+# Função para ler os arquivos transformados
+def carregar_tabelas():
+    # Verificar se os arquivos existem antes de carregar
+    if not os.path.exists(data_folder):
+        raise FileNotFoundError(f"Pasta '{data_folder}' não encontrada!")
+
+    # Ler os arquivos em paralelo (não há dependência entre eles)
+    with ThreadPoolExecutor(max_workers=len(nomes_tabelas)) as executor:
+        return dict(zip(nomes_tabelas, executor.map(ler_feather, nomes_tabelas)))
+
+# Formata a chave mensal AAAAMM como "AAAA-MM" apenas na saída
+def formatar_mes_ano(mes_ano):
+    mes_ano = mes_ano.astype('Int32')
+    ano = (mes_ano // 100).astype('string')
+    mes = (mes_ano % 100).astype('string').str.zfill(2)
+    return ano + '-' + mes
 
 # Função para salvar em CSV
 def salvar_csv(df, nome_arquivo):
     caminho = os.path.join(data_folder, f'{nome_arquivo}.csv')
-    
+
     # Verifica se o arquivo já existe e sobrescreve
     if os.path.exists(caminho):
         print(f"Arquivo {caminho} já existe, será sobrescrito.")
-    
+
+    # Colunas legíveis só no CSV; as tabelas em memória mantêm a chave inteira
+    if 'mes_ano' in df.columns and pd.api.types.is_integer_dtype(df['mes_ano']):
+        df = df.assign(mes_ano=formatar_mes_ano(df['mes_ano']))
+
     # Salva o arquivo em formato CSV
     df.to_csv(caminho, index=False)
     print(f"Arquivo {caminho} salvo com sucesso.")
 
-# Salvar todos os dataframes em CSV
-salvar_csv(agencias, 'agencias_tratado')
-salvar_csv(clientes, 'clientes_tratado')
-salvar_csv(colaborador_agencia, 'colaborador_agencia_tratado')
-salvar_csv(colaboradores, 'colaboradores_tratado')
-salvar_csv(contas, 'contas_tratado')
-salvar_csv(propostas_credito, 'propostas_credito_tratado')
-salvar_csv(transacoes, 'transacoes_tratado')
\ No newline at end of file
+def main(tabelas=None):
+    # Sem tabelas em memória, lê a saída salva pelo transform.py
+    if tabelas is None:
+        tabelas = carregar_tabelas()
+
+    os.makedirs(data_folder, exist_ok=True)
+
+    # Salvar todos os dataframes em CSV
+    for nome, df in tabelas.items():
+        salvar_csv(df, f'{nome}_tratado')
+
+    return tabelas
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,14 +1,24 @@
 import os
 import sys
+import traceback
 from pathlib import Path
-import subprocess
 from datetime import datetime
 
+import pandas as pd
+
+import extract
+import transform
+from cache import calcular_chave, executar_com_cache
+from extract import main as extract_main
+from transform import main as transform_main
+from load import main as load_main, nomes_tabelas
+
 # Configuração de caminhos
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "data"
 RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
+SOURCE_DATA_DIR = BASE_DIR.parent / "banco_uxbg"
 
 def configurar_ambiente():
     """Cria diretórios necessários"""
@@ -29,27 +39,45 @@ def executar_etl():
         # Marcar como "em execução"
         os.environ["ETL_EXECUTING"] = "1"
 
-        # Extração
-        print("\n🔍 Fase de Extração...")
-        subprocess.run([sys.executable, str(BASE_DIR / "extract.py"), 
-                      "--output", str(RAW_DATA_DIR)], check=True)
+        # Chaves do cache: arquivos de origem + código de cada etapa
+        # (a transformação também depende da data, por causa de idade/tempo de cliente)
+        # A mesma referência entra na chave e no transform, para o cache equivaler a uma execução nova
+        agora = pd.Timestamp.now().normalize()
+        arquivos_origem = [p for p in SOURCE_DATA_DIR.iterdir() if p.is_file()]
+        chave_extracao = calcular_chave(arquivos_origem + [Path(extract.__file__)])
+        chave_transformacao = calcular_chave([Path(transform.__file__)], chave_extracao, agora.date().isoformat())
+        
+        def extrair():
+            # Extração (as tabelas seguem em memória entre as fases)
+            print("\n🔍 Fase de Extração...")
+            tabelas = extract_main(salvar=False)
+            
+            # Falhas de leitura retornam None e a tabela some do dicionário:
+            # uma extração incompleta não pode ir para o cache
+            ausentes = [nome for nome in nomes_tabelas if nome not in tabelas]
+            if ausentes:
+                raise RuntimeError(f"Extração incompleta, tabelas ausentes: {', '.join(ausentes)}")
+            return tabelas
+        
+        def transformar():
+            tabelas = executar_com_cache("extract", chave_extracao, extrair)
+            print("\n🔄 Fase de Transformação...")
+            return transform_main(tabelas, salvar=False, agora=agora)
         
-        # Transformação
-        print("\n🔄 Fase de Transformação...")
-        subprocess.run([sys.executable, str(BASE_DIR / "transform.py"),
-                      "--input", str(RAW_DATA_DIR / "dados_extraidos.pkl"),
-                      "--output", str(PROCESSED_DATA_DIR)], check=True)
+        # Extração + Transformação só rodam quando as entradas mudaram
+        tabelas = executar_com_cache("transform", chave_transformacao, transformar)
         
         # Carga
         print("\n📤 Fase de Carga...")
-        subprocess.run([sys.executable, str(BASE_DIR / "load.py"),
-                      "--input", str(PROCESSED_DATA_DIR)], check=True)
+        load_main(tabelas)
         
         duracao = datetime.now() - inicio
         print(f"\n🎉 Concluído em {duracao.total_seconds():.2f}s")
         
-    except subprocess.CalledProcessError as e:
-        print(f"\n❌ Falha no subprocesso: {e.stderr or str(e)}")
+    except Exception as e:
+        # As etapas rodam no mesmo processo: o traceback completo indica onde falhou
+        traceback.print_exc()
+        print(f"\n❌ Falha na execução do ETL: {str(e)}")
         sys.exit(1)
     finally:
         # Limpar variável de controle
@@ -1,3 +1,5 @@
+import logging
+import numpy as np
 import pandas as pd
 import pickle
 import re
@@ -7,6 +9,9 @@ from datetime import datetime
 from typing import Dict, Final
 from types import MappingProxyType
 
+# Mensagens das funções de biblioteca vão para o logging (configurado em main)
+logger = logging.getLogger(__name__)
+
 def get_protected_mapping(original: dict) -> MappingProxyType:
     """Retorna uma versão imutável do dicionário"""
     return MappingProxyType(original.copy())
@@ -51,107 +56,198 @@ _LOCAL_TIPO_CLIENTE_MAP  = {
     'PJ': 'Pessoa Jurídica'
 }
 
+# Versões imutáveis criadas uma única vez na carga do módulo
+_UF_MAP_PROTEGIDO: Final = get_protected_mapping(_LOCAL_UF_MAP)
+_TIPO_CONTA_MAP_PROTEGIDO: Final = get_protected_mapping(_LOCAL_TIPO_CONTA_MAP)
+_TIPO_CLIENTE_MAP_PROTEGIDO: Final = get_protected_mapping(_LOCAL_TIPO_CLIENTE_MAP)
+
 # Funções de acesso seguro aos dicionários
 def get_uf_map() -> MappingProxyType:
     """Retorna cópia imutável do mapeamento de UFs"""
-    return get_protected_mapping(_LOCAL_UF_MAP)
+    return _UF_MAP_PROTEGIDO
 
 def get_tipo_conta_map() -> MappingProxyType:
     """Retorna cópia imutável do mapeamento de tipos de conta"""
-    return get_protected_mapping(_LOCAL_TIPO_CONTA_MAP)
+    return _TIPO_CONTA_MAP_PROTEGIDO
 
 def get_tipo_cliente_map() -> MappingProxyType:
     """Retorna cópia imutável do mapeamento de tipos de cliente"""
-    return get_protected_mapping(_LOCAL_TIPO_CLIENTE_MAP)
+    return _TIPO_CLIENTE_MAP_PROTEGIDO
 
 # Configurações iniciais
-def carregar_dados(caminho_pkl: str) -> Dict[str, pd.DataFrame]:
-    """Carrega os dados do arquivo pickle"""
-    with open(caminho_pkl, 'rb') as f:
-        return pickle.load(f)
+def carregar_dados(caminho_entrada: str) -> Dict[str, pd.DataFrame]:
+    """Carrega os dados extraídos (pasta com um Parquet por tabela ou .pkl legado)"""
+    caminho_entrada = Path(caminho_entrada)
+    
+    # Formato antigo do extract.py: um único pickle com o dicionário de tabelas
+    if caminho_entrada.suffix == '.pkl':
+        with open(caminho_entrada, 'rb') as f:
+            return pickle.load(f)
+    
+    return {
+        caminho.stem: pd.read_parquet(caminho, engine='pyarrow')
+        for caminho in sorted(caminho_entrada.glob('*.parquet'))
+    }
+
+# Colunas texto de baixa cardinalidade usadas como chave de groupby/merge
+# (os códigos numéricos são inteiros e não ganham nada como category)
+_COLUNAS_CATEGORICAS: Final = {
+    'agencias': ('uf',),
+    'clientes': ('tipo_cliente',),
+    'contas': ('tipo_conta',),
+    'propostas_credito': ('status_proposta',),
+    'transacoes': ('nome_transacao',)
+}
+
+def converter_categoricas(tabelas: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Converte as colunas-chave de texto para category (hash sobre códigos int)"""
+    for nome, colunas in _COLUNAS_CATEGORICAS.items():
+        df = tabelas.get(nome)
+        if df is None:
+            continue
+        for coluna in colunas:
+            if coluna in df.columns:
+                df[coluna] = df[coluna].astype('category')
+    return tabelas
+
+def reduzir_ids(tabelas: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Reduz as colunas de identificadores para o menor tipo inteiro que os comporta"""
+    for df in tabelas.values():
+        for coluna in df.columns:
+            if (coluna.startswith('cod_') or coluna == 'num_conta') and pd.api.types.is_integer_dtype(df[coluna]):
+                df[coluna] = pd.to_numeric(df[coluna], downcast='integer')
+    return tabelas
+
+def renomear_categorias(serie: pd.Series, safe_map: dict) -> pd.Series:
+    """Traduz a coluna como Categorical, renomeando apenas os valores distintos"""
+    categorias = serie if isinstance(serie.dtype, pd.CategoricalDtype) else serie.astype('category')
+    novas_categorias = [safe_map.get(c, c) for c in categorias.cat.categories]
+    
+    try:
+        return categorias.cat.rename_categories(novas_categorias)
+    except ValueError:
+        # Mapeamento gera categorias duplicadas (ex.: 'SP' e 'São Paulo' juntos):
+        # o map do Categorical traduz só as categorias e reaproveita os códigos
+        return categorias.map(lambda categoria: safe_map.get(categoria, categoria), na_action='ignore')
 
 # Versão ultra-resiliente da função de mapeamento
 def aplicar_mapeamento(df: pd.DataFrame, coluna: str, mapeamento) -> pd.DataFrame:
     """
     - Aceita dicionários, MappingProxyType ou callable
-    - Conversão segura para dicionário
+    - Mapeamentos são usados diretamente (somente leitura, sem cópia)
     - Fallback automático
     """
     if coluna not in df.columns:
         return df
 
-    # Dicionário de fallback genérico
-    FALLBACK_MAP = {k: k for k in df[coluna].unique()}
-    
     try:
-        # Converte para dicionário se necessário
+        # Obtém o mapeamento se for uma função de acesso
         if callable(mapeamento):
             mapeamento = mapeamento()
         
         if isinstance(mapeamento, (dict, MappingProxyType)):
-            safe_map = dict(mapeamento)
+            safe_map = mapeamento
         else:
-            print(f"⚠️ Tipo inválido: {type(mapeamento)} - Usando fallback")
-            safe_map = FALLBACK_MAP
+            logger.warning("⚠️ Tipo inválido: %s - Usando fallback", type(mapeamento))
+            safe_map = {}  # Sem tradução: as categorias ficam com os valores originais
         
-        df[coluna] = df[coluna].map(safe_map).fillna(df[coluna])
+        df[coluna] = renomear_categorias(df[coluna], safe_map)
         
     except Exception as e:
-        print(f"⛔ Erro crítico: {str(e)} - Aplicando fallback")
-        df[coluna] = df[coluna].map(FALLBACK_MAP).fillna(df[coluna])
+        # Fallback: a coluna segue com os valores originais
+        logger.error("⛔ Erro crítico: %s - Aplicando fallback", e)
     
     return df
 
+# Padrões de UF em ordem de prioridade
+_PADROES_UF = (
+    r'/\s*([A-Z]{2})\b',              # Padrão 1: "... / RS"
+    r'\b([A-Z]{2})\s*\d{5}-?\d{3}$',  # Padrão 2: "RS 90000-000"
+    r'\b([A-Z]{2})\s*$'               # Padrão 3: "... RS"
+)
+
+# Compilados uma única vez no carregamento do módulo
+_REGEX_UF: Final = tuple(re.compile(padrao) for padrao in _PADROES_UF)
+# Alternância com um grupo por padrão (usada na versão vetorizada)
+_REGEX_UF_COMBINADO: Final = re.compile('|'.join(_PADROES_UF))
+
 def extrair_uf(endereco: str) -> str:
     """Extrai UF de um endereço usando regex"""
     if pd.isna(endereco):
         return None
     
-    padroes = [
-        r'/\s*([A-Z]{2})\b',              # Padrão 1: "... / RS"
-        r'\b([A-Z]{2})\s*\d{5}-?\d{3}$',  # Padrão 2: "RS 90000-000"
-        r'\b([A-Z]{2})\s*$'               # Padrão 3: "... RS"
-    ]
-    
-    for padrao in padroes:
-        match = re.search(padrao, str(endereco))
+    for regex in _REGEX_UF:
+        match = regex.search(str(endereco))
         if match:
             return match.group(1).upper()
     return None
 
+def extrair_uf_vetorizado(enderecos: pd.Series) -> pd.Series:
+    """Versão vetorizada de extrair_uf para uma coluna inteira (str.extract)"""
+    # A busca na alternância para no primeiro casamento,
+    # e os padrões 2 e 3 são ancorados no fim, o que preserva a prioridade original
+    grupos = enderecos.astype('string').str.extract(_REGEX_UF_COMBINADO, expand=True)
+    return grupos[0].fillna(grupos[1]).fillna(grupos[2]).str.upper()
+
 def processar_nome_completo(df: pd.DataFrame) -> pd.DataFrame:
     """Combina primeiro_nome e ultimo_nome em nome_completo"""
     if all(col in df.columns for col in ['primeiro_nome', 'ultimo_nome']):
-        df['nome_completo'] = df['primeiro_nome'] + ' ' + df['ultimo_nome']
-        df.drop(columns=['primeiro_nome', 'ultimo_nome'], inplace=True)
-        cols = list(df.columns)
-        cols.insert(1, cols.pop(cols.index('nome_completo')))
-        return df[cols]
+        # Colunas de origem removidas com pop; nome_completo entra logo após o código
+        primeiro_nome = df.pop('primeiro_nome')
+        ultimo_nome = df.pop('ultimo_nome')
+        df.insert(1, 'nome_completo', primeiro_nome.str.cat(ultimo_nome, sep=' '))
     return df
 
-def calcular_idade(df: pd.DataFrame, col_data: str) -> pd.DataFrame:
+# Nanossegundos em um dia (datetime64[ns] visto como int64)
+_NS_POR_DIA = 24 * 60 * 60 * 10**9
+
+def dias_ate(datas: pd.Series, referencia: pd.Timestamp) -> pd.arrays.IntegerArray:
+    """Dias inteiros entre cada data e a referência, calculados sobre int64 (ns)"""
+    nulos = datas.isna().to_numpy()
+    referencia_ns = np.datetime64(referencia, 'ns').view('i8')
+    datas_ns = datas.to_numpy(dtype='datetime64[ns]').view('i8')
+    
+    # NaT substituído pela referência para não estourar o int64; volta como <NA>
+    dias = (referencia_ns - np.where(nulos, referencia_ns, datas_ns)) // _NS_POR_DIA
+    return pd.arrays.IntegerArray(dias, nulos)
+
+def converter_datas(serie: pd.Series, formato: str, utc: bool = False) -> pd.Series:
+    """Converte texto para datetime com formato explícito; colunas já datetime64 não são reprocessadas"""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        if utc:
+            return serie.dt.tz_localize('UTC') if serie.dt.tz is None else serie.dt.tz_convert('UTC')
+        return serie
+    
+    if utc:
+        # O sufixo textual " UTC" da origem não faz parte do ISO 8601
+        serie = serie.astype('string').str.removesuffix(' UTC')
+    return pd.to_datetime(serie, format=formato, errors='coerce', utc=utc)
+
+def calcular_idade(df: pd.DataFrame, col_data: str, agora: pd.Timestamp = None) -> pd.DataFrame:
     """Calcula idade a partir de data de nascimento no formato DD/MM/YYYY"""
+    if agora is None:
+        agora = pd.Timestamp.now()
+    
     if col_data in df.columns:
         # Converte a coluna diretamente para datetime (sem criar nova coluna)
-        df[col_data] = pd.to_datetime(
-            df[col_data], 
-            format='%d/%m/%Y',  # Força o formato brasileiro
-            errors='coerce'      # Converte erros em NaT
-        )
+        # Força o formato brasileiro; erros viram NaT
+        df[col_data] = converter_datas(df[col_data], '%d/%m/%Y')
         
-        # Calcular idade (dias // 365)
-        df['idade'] = ((pd.to_datetime('today') - df[col_data]).dt.days // 365)
-
-        # Converte para inteiro
-        df['idade'] = df['idade'].astype('Int64')
+        # Idade em anos completos: diferença dos anos, menos 1 se o aniversário ainda não chegou
+        nascimento = df[col_data].dt
+        aniversario_pendente = (nascimento.month * 100 + nascimento.day) > (agora.month * 100 + agora.day)
+        df['idade'] = (agora.year - nascimento.year - aniversario_pendente).astype('Int64')
 
     return df
 
 # Chamadas para usar as funções de acesso
-def transformar_clientes(clientes: pd.DataFrame) -> pd.DataFrame:
+def transformar_clientes(clientes: pd.DataFrame, agora: pd.Timestamp = None) -> pd.DataFrame:
     """Pipeline de transformação para clientes"""
+    if agora is None:
+        agora = pd.Timestamp.now()
+    
     # Aplicando mapeamento do dicionário
-    clientes['uf'] = clientes['endereco'].apply(extrair_uf)
+    clientes['uf'] = extrair_uf_vetorizado(clientes['endereco'])
     clientes = aplicar_mapeamento(clientes, 'uf', get_uf_map)
     clientes = aplicar_mapeamento(clientes, 'tipo_cliente', get_tipo_cliente_map)
 
@@ -159,11 +255,12 @@ def transformar_clientes(clientes: pd.DataFrame) -> pd.DataFrame:
     clientes = processar_nome_completo(clientes)
     
     # Tempo como cliente desde sua data de inclusão
-    clientes['data_inclusao'] = pd.to_datetime(clientes['data_inclusao'], errors='coerce').dt.tz_localize(None)
-    clientes['tempo_como_cliente_meses'] = ((pd.Timestamp.now().tz_localize(None) - clientes['data_inclusao']).dt.days / 30).round().astype(int) # Por Mês
+    # Convertida para UTC e depois sem fuso (suporta offsets mistos em um único passe)
+    clientes['data_inclusao'] = converter_datas(clientes['data_inclusao'], 'ISO8601', utc=True).dt.tz_convert(None)
+    clientes['tempo_como_cliente_meses'] = (dias_ate(clientes['data_inclusao'], agora) / 30).round().astype('Int64') # Por Mês
     
     # Idade
-    clientes = calcular_idade(clientes, 'data_nascimento')
+    clientes = calcular_idade(clientes, 'data_nascimento', agora)
     
     return clientes
 
@@ -172,20 +269,21 @@ def transformar_agencias(agencias: pd.DataFrame, contas: pd.DataFrame, transacoe
     # Aplicando mapeamento do dicionário com nome do estado
     agencias = aplicar_mapeamento(agencias, 'uf', get_uf_map)
     
-    # Merge para cálculos
-    contas = pd.merge(contas, agencias, on='cod_agencia', how='left')
-    transacoes_contas = pd.merge(transacoes, contas, on='num_conta', how='left')
-    transacoes_agencias = pd.merge(transacoes_contas, agencias, on='cod_agencia', how='left')
-    
-    # Cálculos agregados
-    agencias['saldo_medio'] = agencias['cod_agencia'].map(
-        contas.groupby('cod_agencia')['saldo_disponivel'].mean())
+    # Merge para cálculos (contas já traz cod_agencia, não precisa das colunas de agências)
+    transacoes_contas = pd.merge(
+        transacoes[['num_conta', 'valor_transacao']], contas[['num_conta', 'cod_agencia']],
+        on='num_conta', how='inner', validate='many_to_one'
+    )
     
-    agencias['num_contas'] = agencias['cod_agencia'].map(
-        contas.groupby('cod_agencia')['num_conta'].count())
+    # Cálculos agregados (um groupby por tabela, unidos em um único merge)
+    metricas = contas.groupby('cod_agencia').agg(
+        saldo_medio=('saldo_disponivel', 'mean'),
+        num_contas=('num_conta', 'count')
+    ).join(transacoes_contas.groupby('cod_agencia').agg(
+        volume_transacoes=('valor_transacao', 'sum')
+    ))
     
-    agencias['volume_transacoes'] = agencias['cod_agencia'].map(
-        transacoes_agencias.groupby('cod_agencia')['valor_transacao'].sum())
+    agencias = agencias.merge(metricas, left_on='cod_agencia', right_index=True, how='left')
 
     return agencias
 
@@ -199,132 +297,114 @@ def transformar_contas(contas: pd.DataFrame) -> pd.DataFrame:
 def transformar_transacoes(transacoes: pd.DataFrame, contas: pd.DataFrame) -> pd.DataFrame:
     """Pipeline de transformação para transações"""
     # Extraindo a data para cálculo de evolução
-    transacoes['data_transacao'] = pd.to_datetime(transacoes['data_transacao'], errors='coerce', utc=True)
-    transacoes['mes_ano'] = transacoes['data_transacao'].dt.tz_localize(None).dt.to_period('M').astype(str)
-    
-    # --- Merge com dados das contas ---
-    transacoes_com_saldo  = transacoes.merge(
-        contas[['num_conta', 'saldo_disponivel']],
-        on='num_conta',
-        how='left'
-    )
+    # Formato ISO 8601 explícito (parte das datas tem fração de segundo)
+    transacoes['data_transacao'] = converter_datas(transacoes['data_transacao'], 'ISO8601', utc=True)
+    # Chave mensal inteira AAAAMM (ex.: 202005); formatada como AAAA-MM só no CSV
+    data_transacao = transacoes['data_transacao'].dt
+    transacoes['mes_ano'] = (data_transacao.year * 100 + data_transacao.month).astype('Int32')
     
-    # Calcula a média de transações por conta (normalizado pelo saldo disponível)
-    transacoes['valor_medio_conta'] = transacoes['num_conta'].map(transacoes.groupby('num_conta')['valor_transacao'].mean())
+    # --- Saldo da conta de cada transação (lookup por num_conta) ---
+    saldo_disponivel = transacoes['num_conta'].map(contas.set_index('num_conta')['saldo_disponivel'])
+    
+    # Média e frequência de transações por conta, reaproveitando o mesmo agrupamento
+    por_conta = transacoes.groupby('num_conta', sort=False)
+    transacoes['valor_medio_conta'] = por_conta['valor_transacao'].transform('mean')  # normalizado pelo saldo disponível
+    transacoes['freq_transacoes'] = por_conta['valor_transacao'].transform('size')
 
     # Razão entre o valor da transação e o saldo disponível (evita valores absurdos)
     # Representa o impacto da transação em percentual no saldo disponível da conta
     # Valores próximos a 1.0 (ou acima) indicam risco de liquidez, pode ser sinal de má gestão ou fraude.
-    transacoes['valor_vs_saldo'] = (transacoes_com_saldo['valor_transacao'].abs() / transacoes_com_saldo['saldo_disponivel'].replace(0, 1e-6))  # Evita divisão por zero
-
-    # Frequência de transações por conta
-    transacoes['freq_transacoes'] = transacoes.groupby('num_conta')['num_conta'].transform('count')
+    transacoes.insert(
+        transacoes.columns.get_loc('valor_medio_conta') + 1,
+        'valor_vs_saldo',
+        transacoes['valor_transacao'].abs() / saldo_disponivel.replace(0, 1e-6)  # Evita divisão por zero
+    )
     
     # Evolução mensal de transações (Evita que transações anômalas, erros ou fraudes, distorçam a análise)
     transacoes['valor_transacao'] = transacoes['valor_transacao'].clip(
         lower=-1e6,  # Limite inferior: -1 milhão
         upper=1e6    # Limite superior: +1 milhão
     )
-    transacoes['valor_transacao'] = transacoes['valor_transacao'].clip(lower=-1e6, upper=1e6)
-    evolucao = transacoes.groupby('mes_ano')['valor_transacao'].sum().reset_index()    
-    transacoes = transacoes.merge(evolucao, on='mes_ano', how='left', suffixes=('', '_evolucao')) # Merge com os dataframes transformados 
+    transacoes['valor_transacao_evolucao'] = transacoes.groupby('mes_ano')['valor_transacao'].transform('sum')
     
     return transacoes
 
 def transformar_propostas(propostas_credito: pd.DataFrame) -> pd.DataFrame:
     """Pipeline de transformação para propostas de crédito"""
     
-    # Taxa de aprovação por colaborador
-    taxa_colab = (
-        propostas_credito.groupby('cod_colaborador')['status_proposta']
-        .apply(lambda x: (x == 'Aprovada').sum())  # Soma de aprovadas
-        .reset_index(name='num_aprovadas')
-    )
+    # Indicador de aprovação (1 para propostas aprovadas)
+    mask_aprovada = propostas_credito['status_proposta'].eq('Aprovada')
+    aprovada = mask_aprovada.astype('int8')
     
-    total_propostas = (
-        propostas_credito.groupby('cod_colaborador').size()
-        .reset_index(name='total_propostas')
+    # Taxa de aprovação por colaborador
+    aprovacoes_colab = (
+        aprovada.groupby(propostas_credito['cod_colaborador'])
+        .agg(num_aprovadas='sum', total_propostas='size')  # Soma de aprovadas e total em um só passe
     )
-    
-    # Merge para taxa dos colaboradres
-    taxa_colab = taxa_colab.merge(total_propostas, on='cod_colaborador')
-    taxa_colab['taxa_aprovacao_colab'] = (taxa_colab['num_aprovadas'] / taxa_colab['total_propostas']) * 100
-    taxa_colab = taxa_colab[['cod_colaborador', 'taxa_aprovacao_colab']]
+    taxa_colab = (aprovacoes_colab['num_aprovadas'] / aprovacoes_colab['total_propostas']) * 100
 
     # Taxa de aprovação por cliente
-    taxa_cliente = (
-        propostas_credito.groupby('cod_cliente')['status_proposta']
-        .apply(lambda x: (x == 'Aprovada').sum())
-        .reset_index(name='num_aprovadas')
-    )
-
-    total_clientes = (
-        propostas_credito.groupby('cod_cliente').size()
-        .reset_index(name='total_propostas')
+    aprovacoes_cliente = (
+        aprovada.groupby(propostas_credito['cod_cliente'])
+        .agg(num_aprovadas='sum', total_propostas='size')
     )
-
-    # Merge para taxa dos clientes
-    taxa_cliente = taxa_cliente.merge(total_clientes, on='cod_cliente')
-    taxa_cliente['taxa_aprovacao_cliente'] = (taxa_cliente['num_aprovadas'] / taxa_cliente['total_propostas']) * 100
-    taxa_cliente = taxa_cliente[['cod_cliente', 'taxa_aprovacao_cliente']]
-
+    taxa_cliente = (aprovacoes_cliente['num_aprovadas'] / aprovacoes_cliente['total_propostas']) * 100
+    
+    # Contagem de propostas por cliente (frequência), reaproveitada do mesmo groupby
+    count_cliente = aprovacoes_cliente['total_propostas']
+    
+    # Taxas só são atribuídas às propostas aprovadas; as demais ficam zeradas
+    propostas_credito['taxa_aprovacao_colab'] = np.where(
+        mask_aprovada, propostas_credito['cod_colaborador'].map(taxa_colab), 0.0)
+    propostas_credito['taxa_aprovacao_cliente'] = np.where(
+        mask_aprovada, propostas_credito['cod_cliente'].map(taxa_cliente), 0.0)
+    
     # Valor médio da proposta por status e cliente
-    media_status_cliente = (propostas_credito
-                          .groupby(['status_proposta', 'cod_cliente'])['valor_proposta']
-                          .mean()
-                          .reset_index(name='media_status_cliente'))
-    
-    # Contagem de propostas por cliente (frequência)
-    count_cliente = (propostas_credito
-                   .groupby('cod_cliente')
-                   .size()
-                   .reset_index(name='total_propostas_cliente'))
-    
-    # Merge todas as métricas
-    propostas_credito = propostas_credito.merge(taxa_colab, on='cod_colaborador', how='left')
-    propostas_credito = propostas_credito.merge(taxa_cliente, on='cod_cliente', how='left')
-    propostas_credito = propostas_credito.merge(media_status_cliente, 
-                                              on=['status_proposta', 'cod_cliente'], 
-                                              how='left')
-    propostas_credito = propostas_credito.merge(count_cliente, on='cod_cliente', how='left')
+    propostas_credito['media_status_cliente'] = (propostas_credito
+                          .groupby(['status_proposta', 'cod_cliente'], observed=True)['valor_proposta']
+                          .transform('mean'))
+    propostas_credito['total_propostas_cliente'] = propostas_credito['cod_cliente'].map(count_cliente)
     
     # Diferença entre valor da proposta e média do cliente - análise de risco
     propostas_credito['diferenca_media_cliente'] = \
         propostas_credito['valor_proposta'] - propostas_credito['media_status_cliente']
-    
-     # Zerar taxas para propostas não aprovadas
-    propostas_credito['taxa_aprovacao_colab'] = propostas_credito.apply(
-        lambda x: x['taxa_aprovacao_colab'] if x['status_proposta'] == 'Aprovada' else 0,
-        axis=1
-    )
-    
-    propostas_credito['taxa_aprovacao_cliente'] = propostas_credito.apply(
-        lambda x: x['taxa_aprovacao_cliente'] if x['status_proposta'] == 'Aprovada' else 0,
-        axis=1
-    )
 
     return propostas_credito
 
 def salvar_dados(tabelas: Dict[str, pd.DataFrame], output_folder: str):
-    """Salva todos os DataFrames em arquivos pickle"""
+    """Salva todos os DataFrames em arquivos Feather (Arrow IPC) sem compressão"""
     output_path = Path(output_folder)
     output_path.mkdir(parents=True, exist_ok=True)
     
     for nome, df in tabelas.items():
-        caminho = output_path / f"{nome}.pkl"
-        df.to_pickle(caminho)
-        print(f"✅ {nome}.pkl salvo em {caminho}")
-
-def main():
+        caminho = output_path / f"{nome}.feather"
+        # Sem compressão para que o load.py possa mapear o arquivo em memória
+        df.to_feather(caminho, compression='uncompressed')
+        logger.info("✅ %s.feather salvo em %s", nome, caminho)
+
+def main(tabelas: Dict[str, pd.DataFrame] = None, salvar: bool = True, agora: pd.Timestamp = None):
+    # Logging configurado uma única vez (sem efeito se quem chamou já configurou)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     # Configurações
-    input_path = "c:/Users/guilh/OneDrive/Documentos/GitHub/desafio_reals_bet/src/dados_extraidos.pkl"
-    output_folder = "c:/Users/guilh/OneDrive/Documentos/GitHub/desafio_reals_bet/src/dados_transformados"
+    base_dir = Path(__file__).parent
+    input_path = base_dir / "dados_extraidos"
+    if not input_path.is_dir():
+        input_path = base_dir / "dados_extraidos.pkl"  # Extração salva por versões antigas
+    output_folder = base_dir / "dados_transformados"
+    
+    # Referência de data única para toda a execução (meia-noite do dia: o resultado só muda de um dia para o outro)
+    if agora is None:
+        agora = pd.Timestamp.now().normalize()
     
-    # Pipeline principal
-    tabelas = carregar_dados(input_path)
+    # Pipeline principal (lê do disco apenas quando executado isoladamente)
+    if tabelas is None:
+        tabelas = carregar_dados(input_path)
+    tabelas = converter_categoricas(tabelas)
+    tabelas = reduzir_ids(tabelas)
     
     # Aplicar transformações
-    tabelas['clientes'] = transformar_clientes(tabelas['clientes'])
+    tabelas['clientes'] = transformar_clientes(tabelas['clientes'], agora)
     print(tabelas['clientes'].head())
     tabelas['agencias'] = transformar_agencias(tabelas['agencias'], tabelas['contas'], tabelas['transacoes'])
     tabelas['contas'] = transformar_contas(tabelas['contas'])
@@ -334,7 +414,8 @@ def main():
     tabelas['colaboradores'] = processar_nome_completo(tabelas['colaboradores'])
 
     # Salvar resultados
-    salvar_dados(tabelas, output_folder)
+    if salvar:
+        salvar_dados(tabelas, output_folder)
     
     return tabelas
 